@@ -1,50 +1,129 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from modules.technical import calculate_technical_indicators
 from modules.fundamental import get_fundamental_analysis
 from modules.sentiment import get_sentiment_analysis
-from modules.risk import get_risk_analysis
-from datetime import datetime, time
-import pytz
+from modules.utils import CRORE, YFRateLimitError
+from modules import cache
+from datetime import datetime, time as dt_time
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+from operator import itemgetter
+from zoneinfo import ZoneInfo
+import time
+import os
 import uvicorn
+import yfinance as yf
 import numpy as np
+import asyncio
 import logging
 import re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Indian Equity Intelligence Backend")
+# The blocking yfinance extractors run on the event loop's default executor: three
+# fetches per analysis, for up to eight analyses in flight.
+FETCH_WORKERS = 24
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+    asyncio.get_running_loop().set_default_executor(executor)
+    yield
+    executor.shutdown(wait=False)
+
+app = FastAPI(title="Indian Equity Intelligence Backend", lifespan=lifespan)
+
+class UnhandledExceptionMiddleware:
+    """
+    Turns unhandled exceptions into a JSON 500. It is added before CORSMiddleware so it runs
+    inside it and the 500 still carries CORS headers; an @app.exception_handler(Exception) runs
+    in the outermost ServerErrorMiddleware instead, which also re-raises to the server.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+            # 500 only for true backend server failures; expected failures are reported in the response body.
+            request = Request(scope)
+            logger.error(f"Unhandled exception in {request.url.path}?{request.url.query}: {exc}", exc_info=exc)
+            response = JSONResponse(status_code=500, content={"detail": "Internal server error during analysis"})
+            await response(scope, receive, send)
+
+app.add_middleware(UnhandledExceptionMiddleware)
 
 # CORS Configuration
+# Frontend origins are whitelisted explicitly (comma-separated CORS_ORIGINS); browsers
+# may cache preflight responses for a day.
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",") if o.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
-def is_indian_market_open():
-    """Checks if the Indian stock market (NSE/BSE) is currently open."""
-    # Market hours: 9:15 AM - 3:30 PM IST, Mon-Fri
-    ist = pytz.timezone('Asia/Kolkata')
-    now = datetime.now(ist)
+# Analysis payloads (rationale, results, headlines) compress well; tiny bodies are sent as-is.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Market hours: 9:15 AM - 3:30 PM IST, Mon-Fri
+IST = ZoneInfo('Asia/Kolkata')
+MARKET_START = dt_time(9, 15)
+MARKET_END = dt_time(15, 30)
+
+@lru_cache(maxsize=2)
+def _market_status(minute_bucket: int) -> str:
+    now = datetime.fromtimestamp(minute_bucket * 60, IST)
     
     # Weekends (Saturday=5, Sunday=6)
     if now.weekday() >= 5:
         return "Closed (Weekend)"
     
-    market_start = now.replace(hour=9, minute=15, second=0, microsecond=0)
-    market_end = now.replace(hour=15, minute=30, second=0, microsecond=0)
-    
-    if market_start <= now <= market_end:
+    # End-exclusive: the 15:30 minute is already closed, matching an exact check that is
+    # open only through 15:30:00.
+    if MARKET_START <= now.time() < MARKET_END:
         return "Open 🟢"
     else:
         return "Closed (Market Hours: 9:15 AM - 3:30 PM IST)"
 
+def is_indian_market_open():
+    """Checks if the Indian stock market (NSE/BSE) is currently open."""
+    # The answer only changes minute to minute, so it is memoized per epoch minute.
+    return _market_status(int(time.time() // 60))
+
+# Completed analyses are cached as serialized JSON for a minute while the market is open
+# and for an hour once it is closed. The open/closed flag is part of the key, so the
+# open -> close transition naturally invalidates intraday entries.
+RESPONSE_TTL_OPEN = 60
+RESPONSE_TTL_CLOSED = 3600
+
 # Pydantic Models for v3.4 Schema
 
 class Officer(BaseModel):
@@ -132,195 +211,350 @@ class AnalysisResponse(BaseModel):
     verdict: Optional[str] = None
     rationale: Optional[str] = None
 
+RESULT_FIELDS = ("revenue", "operating_profit", "net_profit")
+
+def format_financial_results(results: list) -> List[FinancialResult]:
+    """
+    Converts raw quarterly/annual figures into Crore strings in one vectorized pass.
+    Missing, NaN and zero values are reported as "N/A".
+    """
+    if not results:
+        return []
+
+    values = np.array([[r.get(f) for f in RESULT_FIELDS] for r in results], dtype=np.float64)
+    formatted = np.where(
+        np.isnan(values) | (values == 0),
+        "N/A",
+        np.char.mod("%.2f Cr", values / CRORE)
+    ).tolist()
+
+    return [
+        FinancialResult.model_construct(period=r.get('period', 'N/A'), **dict(zip(RESULT_FIELDS, row)))
+        for r, row in zip(results, formatted)
+    ]
+
+def calculate_scores(rsi, st_signal, de, roce, avg_polarity):
+    """
+    Expert scoring kernel. Returns (technical, fundamental, sentiment, overall) scores.
+    """
+    # Technical Score
+    tech_score = 50
+    if st_signal == "Bullish": tech_score += 20
+    if rsi and 40 <= rsi <= 60: tech_score += 15
+
+    # Fundamental Score
+    fund_score = 50
+    if de is not None and de < 1: fund_score += 20  # debt-free (0.0) companies qualify too
+    if roce and roce > 15: fund_score += 20
+
+    # Sentiment
+    sent_score = int((avg_polarity + 1) * 50)
+
+    overall_score = int((tech_score * 0.4) + (fund_score * 0.4) + (sent_score * 0.2))
+    return tech_score, fund_score, sent_score, min(max(overall_score, 0), 100)
+
+# overall_score > 70 -> STRONG BUY, > 50 -> BUY, > 40 -> HOLD, otherwise SELL
+SIGNAL_THRESHOLDS = (40, 50, 70)
+SIGNALS = (
+    ("SELL", "TRAP ⚠️"),
+    ("HOLD", "TRAP ⚠️"),
+    ("BUY", "TREASURE 💎"),
+    ("STRONG BUY", "TREASURE 💎"),
+)
+
+RATIONALE_TEMPLATE = (
+    "Technical View: The stock is showing a {daily} trend on the daily chart and a {weekly} trend on the weekly chart. "
+    "{timeframe_view}"
+    "Fundamental View: With an ROCE of {roce} and an Intrinsic Value of {intrinsic_value}, "
+    "the stock is technically {super_trend}. Overall Verdict: {verdict}."
+)
+
+TICKER_PATTERN = re.compile(r'^[A-Z0-9\-\.]+$')
+NOT_FOUND_MESSAGE = "No market data found for this ticker."
+NOT_FOUND_DISPLAY_TEMPLATE = "No market data found for {}"
+
+def error_response(ticker: str, error_code: str, message: str, display_message: str) -> AnalysisResponse:
+    """
+    Builds an unsuccessful AnalysisResponse. Every field is a known-good literal,
+    so the model is constructed without validation.
+    """
+    return AnalysisResponse.model_construct(
+        success=False,
+        partial=False,
+        ticker=ticker,
+        error_code=error_code,
+        message=message,
+        display_message=display_message,
+        meta={"timestamp_utc": datetime.utcnow().isoformat()}
+    )
+
+def not_found_response(ticker: str) -> AnalysisResponse:
+    return error_response(ticker, "SYMBOL_NOT_FOUND", NOT_FOUND_MESSAGE, NOT_FOUND_DISPLAY_TEMPLATE.format(ticker))
+
+# Batch requests fan out to the single-ticker engine; the semaphore is shared by all
+# batch requests so upstream sources never see more than 8 analyses at once.
+BATCH_MAX_TICKERS = 50
+_batch_semaphore = asyncio.Semaphore(8)
+
+# Seconds clients are asked to wait after Yahoo rate-limits us.
+RATE_LIMIT_RETRY_AFTER = 60
+
+@app.exception_handler(YFRateLimitError)
+async def rate_limit_exception_handler(request: Request, exc: YFRateLimitError):
+    logger.warning(f"Upstream rate limit in {request.url.path}?{request.url.query}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Market data provider is rate limiting requests. Please retry later."},
+        headers={"Retry-After": str(RATE_LIMIT_RETRY_AFTER)}
+    )
+
 @app.get("/")
-def health_check():
+async def health_check():
     return {"status": "ok", "message": "Stock Alpha Analyst v3.4 Engine is running"}
 
-@app.get("/analyze", response_model=AnalysisResponse)
-def analyze_stock(ticker: str = Query(..., description="Ticker symbol (e.g. RELIANCE.NS)")):
+async def analysis_json(ticker: str, ticker_original: str) -> bytes:
     """
-    Analyzes a stock ticker using the v3.4 Engine logic.
+    Returns the serialized AnalysisResponse for an already normalized (stripped, upper-cased)
+    ticker, served from the response cache when possible. Only complete, successful analyses are cached.
     """
-    logger.info(f"Received request for ticker: {ticker}")
-    ticker_original = ticker
-    
-    # 0. Input validation
-    ticker = ticker.strip().upper()
-    if not re.match(r'^[A-Z0-9\-\.]+$', ticker):
+    logger.info(f"Received request for ticker: {ticker_original}")
+
+    # 0. Input validation (before the symbol is used as a cache key)
+    if not TICKER_PATTERN.match(ticker):
         logger.warning(f"Invalid symbol format: {ticker}")
-        return AnalysisResponse(
-            success=False,
-            partial=False,
-            ticker=ticker,
-            error_code="INVALID_SYMBOL_FORMAT",
-            message="Ticker format is invalid.",
-            display_message=f"Invalid format for ticker '{ticker_original}'.",
-            meta={"timestamp_utc": datetime.utcnow().isoformat()}
-        )
+        return error_response(
+            ticker,
+            "INVALID_SYMBOL_FORMAT",
+            "Ticker format is invalid.",
+            f"Invalid format for ticker '{ticker_original}'."
+        ).model_dump_json().encode()
+
+    # 1. Market Environment
+    m_status = is_indian_market_open()
+    is_open = "Open 🟢" in m_status
+
+    cache_key = f"analysis:{ticker}:{int(is_open)}"
+    raw = await cache.get_async(cache_key)
+    if raw is not None:
+        logger.info(f"[{ticker}] Serving cached analysis.")
+        return raw
+
+    response = await build_analysis(ticker, m_status)
+    raw = response.model_dump_json().encode()
+    if response.success and not response.partial:
+        await cache.set_async(cache_key, raw, RESPONSE_TTL_OPEN if is_open else RESPONSE_TTL_CLOSED)
+    return raw
+
+async def build_analysis(ticker: str, m_status: str) -> AnalysisResponse:
+    """
+    Analyzes a validated, normalized stock ticker using the v3.4 Engine logic.
+    """
+    is_open = "Open 🟢" in m_status
 
     warnings = []
     partial = False
     
-    try:
-        # 1. Multi-source Extraction
-        logger.info(f"[{ticker}] Fetching technical data...")
-        tech_data = calculate_technical_indicators(ticker)
-        
-        if "error" in tech_data:
-            logger.error(f"[{ticker}] Technical data error: {tech_data['error']}")
-            return AnalysisResponse(
-                success=False,
-                partial=False,
-                ticker=ticker,
-                error_code="SYMBOL_NOT_FOUND",
-                message="No market data found for this ticker.",
-                display_message=f"No market data found for {ticker}",
-                meta={"timestamp_utc": datetime.utcnow().isoformat()}
-            )
-            
-        logger.info(f"[{ticker}] Fetching fundamental data...")
-        fund_data = get_fundamental_analysis(ticker)
-        if "error" in fund_data:
-             logger.warning(f"[{ticker}] Fundamental data error: {fund_data['error']}")
-             warnings.append(f"Fundamentals unavailable: {fund_data['error']}")
-             partial = True
-             fund_data = {}  # Default to empty structure
-        
-        logger.info(f"[{ticker}] Fetching sentiment data...")
-        sent_data = get_sentiment_analysis(ticker)
-        if "error" in sent_data:
-             logger.warning(f"[{ticker}] Sentiment data error: {sent_data['error']}")
-             warnings.append(f"News sentiment unavailable: {sent_data['error']}")
-             partial = True
-             sent_data = {}
-        
-        # 2. Market Environment
-        m_status = is_indian_market_open()
-        is_open = "Open 🟢" in m_status
-        
-        # 3. Financial Formatting (Crores)
-        def to_cr(val):
-            return f"{val/10**7:.2f} Cr" if val and not np.isnan(val) else "N/A"
-
-        formatted_q = []
-        for q in fund_data.get("quarterly_results", []):
-            formatted_q.append(FinancialResult(
-                period=q.get('period', 'N/A'),
-                revenue=to_cr(q.get('revenue')),
-                operating_profit=to_cr(q.get('operating_profit')),
-                net_profit=to_cr(q.get('net_profit'))
-            ))
-            
-        formatted_a = []
-        for a in fund_data.get("annual_results", []):
-            formatted_a.append(FinancialResult(
-                period=a.get('period', 'N/A'),
-                revenue=to_cr(a.get('revenue')),
-                operating_profit=to_cr(a.get('operating_profit')),
-                net_profit=to_cr(a.get('net_profit'))
-            ))
-
-        # 4. Expert Scoring Logic
-        # Technical Score
-        rsi = tech_data.get("RSI")
-        tech_score = 50
-        st_signal = tech_data.get("SuperTrend", {}).get("signal")
-        if st_signal == "Bullish": tech_score += 20
-        if rsi and 40 <= rsi <= 60: tech_score += 15
-        
-        # Fundamental Score
-        metrics = fund_data.get("metrics", {})
-        fund_score = 50
-        de = metrics.get("debt_to_equity")
-        roce = metrics.get("roce")
-        if de and de < 1: fund_score += 20
-        if roce and roce > 15: fund_score += 20
-        
-        # Sentiment
-        sent_score = int((sent_data.get("average_polarity", 0) + 1) * 50)
-        
-        overall_score = int((tech_score * 0.4) + (fund_score * 0.4) + (sent_score * 0.2))
-        overall_score = min(max(overall_score, 0), 100)
-        
-        if overall_score > 70: signal, verdict = "STRONG BUY", "TREASURE 💎"
-        elif overall_score > 50: signal, verdict = "BUY", "TREASURE 💎"
-        elif overall_score > 40: signal, verdict = "HOLD", "TRAP ⚠️"
-        else: signal, verdict = "SELL", "TRAP ⚠️"
-
-        # 5. Trading Expert Analysis (Multi-timeframe)
-        tf = tech_data.get("timeframe_analysis", {})
-        expert_rationale = f"Technical View: The stock is showing a {tf.get('daily', 'Neutral')} trend on the daily chart and a {tf.get('weekly', 'Neutral')} trend on the weekly chart. "
-        if tf.get('daily') == tf.get('weekly') == tf.get('monthly') and tf.get('daily') not in [None, "N/A"]:
-            expert_rationale += f"There is rare multi-timeframe alignment signaling a powerful {tf.get('daily')} phase. "
-        elif tf.get('daily') and "Bullish" in tf.get('daily') and tf.get('weekly') and "Bearish" in tf.get('weekly'):
-            expert_rationale += "We are seeing a potential bullish reversal on the short-term chart despite long-term pressure. "
-        else:
-            expert_rationale += f"The monthly chart remains {tf.get('monthly', 'Neutral')}, indicating overall sideways or trending behavior. "
-            
-        roce_val = f"{roce:.2f}%" if roce else "N/A"
-        iv_val = f"{metrics.get('intrinsic_value'):.2f}" if metrics.get('intrinsic_value') else "N/A"
-        
-        expert_rationale += f"Fundamental View: With an ROCE of {roce_val} and an Intrinsic Value of {iv_val}, "
-        expert_rationale += f"the stock is technically {st_signal}. Overall Verdict: {verdict}."
-
-        price = metrics.get("price") or tech_data.get("current_price")
-
-        response = AnalysisResponse(
-            success=True,
-            partial=partial,
-            warnings=warnings,
-            meta={"timestamp_utc": datetime.utcnow().isoformat()},
-            ticker=ticker,
-            company_info=fund_data.get("company_info"),
-            current_price=price if is_open else None,
-            closing_price=price if not is_open else None,
-            overall_score=overall_score,
-            signal=signal,
-            technical=TechnicalOutput(
-                score=tech_score,
-                rsi=rsi,
-                trend=tf.get("daily", "Neutral"),
-                macd=tech_data.get("MACD_Signal"),
-                bollinger=TechnicalBollinger(**tech_data.get("Bollinger", {})),
-                super_trend=TechnicalSuperTrend(**tech_data.get("SuperTrend", {})),
-                support=tech_data.get("Support"),
-                resistance=tech_data.get("Resistance"),
-                timeframe_analysis=TimeframeAnalysis(**tf)
-            ),
-            fundamental=FundamentalOutput(
-                score=fund_score,
-                pe=metrics.get("pe_ratio"),
-                industry_pe=str(metrics.get("industry_pe")) if metrics.get("industry_pe") else None,
-                peg_ratio=metrics.get("peg_ratio"),
-                debt_equity=metrics.get("debt_to_equity"),
-                roe=metrics.get("roe"),
-                roce=metrics.get("roce"),
-                intrinsic_value=metrics.get("intrinsic_value"),
-                market_cap=metrics.get("market_cap"),
-                dividend_yield=metrics.get("dividend_yield")
-            ),
-            sentiment=SentimentOutput(
-                score=sent_score,
-                headlines=[h['headline'] for h in sent_data.get("headlines", [])[:5]]
-            ),
-            quarterly_results=formatted_q,
-            annual_results=formatted_a,
-            market_status=m_status,
-            is_market_open=is_open,
-            verdict=verdict,
-            rationale=expert_rationale
-        )
-        
-        logger.info(f"[{ticker}] Analysis complete. Success={response.success}, Partial={response.partial}")
-        return response
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"[{ticker}] Unhandled exception in analyze_stock: {e}", exc_info=True)
-        # Fallback for unexpected errors instead of raw 500 if possible, but 500 is fine for true crashes 
-        # as requested "500 only for true backend server failures".
-        raise HTTPException(status_code=500, detail="Internal server error during analysis")
+    # 2. Multi-source Extraction (the three sources are independent, so fetch them concurrently)
+    logger.info(f"[{ticker}] Fetching technical, fundamental and sentiment data...")
+    # One yf.Ticker is shared by all extractors so per-symbol state (e.g. .info) is fetched once.
+    stock = yf.Ticker(ticker)
+    tech_data, fund_data, sent_data = await asyncio.gather(
+        asyncio.to_thread(calculate_technical_indicators, ticker, ticker=stock),
+        asyncio.to_thread(get_fundamental_analysis, ticker, ticker=stock),
+        asyncio.to_thread(get_sentiment_analysis, ticker, ticker=stock),
+        return_exceptions=True
+    )
+    # A rate limit means any retry would fail too, so no partial analysis is built.
+    for res in (tech_data, fund_data, sent_data):
+        if isinstance(res, YFRateLimitError):
+            raise res
+    tech_data, fund_data, sent_data = (
+        {"error": str(res)} if isinstance(res, Exception) else res
+        for res in (tech_data, fund_data, sent_data)
+    )
+
+    if "error" in tech_data:
+        logger.error(f"[{ticker}] Technical data error: {tech_data['error']}")
+        return not_found_response(ticker)
+
+    if "error" in fund_data:
+         logger.warning(f"[{ticker}] Fundamental data error: {fund_data['error']}")
+         warnings.append(f"Fundamentals unavailable: {fund_data['error']}")
+         partial = True
+         fund_data = {}  # Default to empty structure
+    elif fund_data.get("missing"):
+         logger.warning(f"[{ticker}] Fundamental statements missing: {fund_data['missing']}")
+         warnings.append(f"Fundamentals incomplete: {', '.join(fund_data['missing'])} unavailable")
+         partial = True
+
+    if "error" in sent_data:
+         logger.warning(f"[{ticker}] Sentiment data error: {sent_data['error']}")
+         warnings.append(f"News sentiment unavailable: {sent_data['error']}")
+         partial = True
+         sent_data = {}
+    
+    # 3. Financial Formatting (Crores)
+    formatted_q = format_financial_results(fund_data.get("quarterly_results", []))
+    formatted_a = format_financial_results(fund_data.get("annual_results", []))
+
+    # 4. Expert Scoring Logic
+    # Every field used by scoring, the rationale and the response is bound once here.
+    rsi = tech_data.get("RSI")
+    super_trend = tech_data.get("SuperTrend") or {}
+    st_signal = super_trend.get("signal")
+    tf = tech_data.get("timeframe_analysis") or {}
+    daily, weekly, monthly = tf.get("daily"), tf.get("weekly"), tf.get("monthly")
+
+    metrics = fund_data.get("metrics") or {}
+    pe = metrics.get("pe_ratio")
+    industry_pe = metrics.get("industry_pe")
+    peg = metrics.get("peg_ratio")
+    de = metrics.get("debt_to_equity")
+    roe = metrics.get("roe")
+    roce = metrics.get("roce")
+    iv = metrics.get("intrinsic_value")
+    market_cap = metrics.get("market_cap")
+    dividend_yield = metrics.get("dividend_yield")
+    # Fundamentals are cached for a day, so prefer the fresher price from the technical pass.
+    price = tech_data.get("current_price") or metrics.get("price")
+
+    tech_score, fund_score, sent_score, overall_score = calculate_scores(
+        rsi, st_signal, de, roce, sent_data.get("average_polarity", 0)
+    )
+    
+    signal, verdict = SIGNALS[bisect_left(SIGNAL_THRESHOLDS, overall_score)]
+
+    # 5. Trading Expert Analysis (Multi-timeframe)
+    if daily == weekly == monthly and daily not in [None, "N/A"]:
+        timeframe_view = f"There is rare multi-timeframe alignment signaling a powerful {daily} phase. "
+    elif daily and "Bullish" in daily and weekly and "Bearish" in weekly:
+        timeframe_view = "We are seeing a potential bullish reversal on the short-term chart despite long-term pressure. "
+    else:
+        timeframe_view = f"The monthly chart remains {monthly or 'Neutral'}, indicating overall sideways or trending behavior. "
+
+    expert_rationale = RATIONALE_TEMPLATE.format(
+        daily=daily or 'Neutral',
+        weekly=weekly or 'Neutral',
+        timeframe_view=timeframe_view,
+        roce=f"{roce:.2f}%" if roce else "N/A",
+        intrinsic_value=f"{iv:.2f}" if iv else "N/A",
+        super_trend=st_signal,
+        verdict=verdict
+    )
+
+    company_info = fund_data.get("company_info")
+    if company_info:
+        company_info = CompanyInfo.model_construct(**{
+            **company_info,
+            "officers": [Officer.model_construct(**o) for o in company_info.get("officers", [])]
+        })
+
+    # The extractor payloads are trusted, so the response tree is assembled with
+    # model_construct() instead of validating every nested model field by field.
+    response = AnalysisResponse.model_construct(
+        success=True,
+        partial=partial,
+        warnings=warnings,
+        meta={"timestamp_utc": datetime.utcnow().isoformat()},
+        ticker=ticker,
+        company_info=company_info,
+        current_price=price if is_open else None,
+        closing_price=price if not is_open else None,
+        overall_score=overall_score,
+        signal=signal,
+        technical=TechnicalOutput.model_construct(
+            score=tech_score,
+            rsi=rsi,
+            trend=daily or "Neutral",
+            macd=tech_data.get("MACD_Signal"),
+            bollinger=TechnicalBollinger.model_construct(**tech_data.get("Bollinger", {})),
+            super_trend=TechnicalSuperTrend.model_construct(**super_trend),
+            support=tech_data.get("Support"),
+            resistance=tech_data.get("Resistance"),
+            timeframe_analysis=TimeframeAnalysis.model_construct(**tf)
+        ),
+        fundamental=FundamentalOutput.model_construct(
+            score=fund_score,
+            pe=pe,
+            industry_pe=str(industry_pe) if industry_pe else None,
+            peg_ratio=peg,
+            debt_equity=de,
+            roe=roe,
+            roce=roce,
+            intrinsic_value=iv,
+            market_cap=market_cap,
+            dividend_yield=dividend_yield
+        ),
+        sentiment=SentimentOutput.model_construct(
+            score=sent_score,
+            headlines=list(map(itemgetter('headline'), sent_data.get("headlines", [])[:5]))
+        ),
+        quarterly_results=formatted_q,
+        annual_results=formatted_a,
+        market_status=m_status,
+        is_market_open=is_open,
+        verdict=verdict,
+        rationale=expert_rationale
+    )
+    
+    logger.info(f"[{ticker}] Analysis complete. Success={response.success}, Partial={response.partial}")
+    return response
+
+# Both endpoints return the cached JSON bytes directly; response_model still documents the schema.
+@app.get("/analyze", response_model=AnalysisResponse)
+async def analyze_stock(ticker: str = Query(..., description="Ticker symbol (e.g. RELIANCE.NS)")):
+    """
+    Analyzes a stock ticker using the v3.4 Engine logic.
+    """
+    return Response(content=await analysis_json(ticker.strip().upper(), ticker), media_type="application/json")
+
+@app.get("/analyze_batch", response_model=List[AnalysisResponse])
+async def analyze_batch(tickers: str = Query(..., description="Comma-separated ticker symbols (e.g. RELIANCE.NS,TCS.NS)")):
+    """
+    Analyzes several tickers concurrently in one request, reusing the single-ticker engine.
+    """
+    # Normalize once up front so "tcs.ns,TCS.NS" is analyzed a single time.
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if len(symbols) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TICKERS} tickers can be analyzed per request.")
+
+    async def analyze_one(symbol):
+        async with _batch_semaphore:
+            return await analysis_json(symbol, symbol)
+
+    results = await asyncio.gather(*(analyze_one(s) for s in symbols), return_exceptions=True)
+    responses = []
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, YFRateLimitError):
+            logger.warning(f"[{symbol}] Upstream rate limit in analyze_batch: {result}")
+            result = error_response(
+                symbol,
+                "RATE_LIMITED",
+                "Market data provider is rate limiting requests.",
+                f"Analysis for {symbol} is temporarily unavailable. Please retry later."
+            ).model_dump_json().encode()
+        elif isinstance(result, Exception):
+            logger.error(f"[{symbol}] Unhandled exception in analyze_batch: {result}", exc_info=result)
+            result = error_response(
+                symbol,
+                "INTERNAL_ERROR",
+                "Internal server error during analysis",
+                f"Analysis failed for {symbol}"
+            ).model_dump_json().encode()
+        responses.append(result)
+    return Response(content=b"[" + b",".join(responses) + b"]", media_type="application/json")
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # ENV=prod starts WEB_CONCURRENCY workers; otherwise a single auto-reloading dev server runs.
+    # "auto" picks uvloop/httptools when installed (not on Windows) and falls back cleanly.
+    if os.getenv("ENV") == "prod":
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            loop="auto",
+            http="auto"
+        )
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
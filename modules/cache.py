@@ -0,0 +1,146 @@
+import os
+import time
+import json
+import zlib
+import logging
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from cachetools import LRUCache
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+# Seconds; an unreachable Redis should cost a cache miss, not a stuck worker thread.
+REDIS_TIMEOUT = 1.0
+
+class MemoryBackend:
+    """
+    In-process LRU cache with per-entry expiry checked against time.monotonic().
+    """
+    blocking = False
+
+    def __init__(self, maxsize: int = 4096):
+        self._entries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        return value if time.monotonic() < expires_at else None
+
+    def set(self, key: str, value, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+class RedisBackend:
+    """
+    Redis cache shared by all workers. Dict payloads are stored as zlib-compressed JSON and
+    pre-serialized bytes as-is, each behind a one-byte type tag. Redis failures and unreadable
+    entries degrade to cache misses instead of failing the request.
+    """
+    blocking = True
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT
+        )
+
+    def get(self, key: str):
+        try:
+            raw = self._client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Redis GET failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return _decode(raw)
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value, ttl: int):
+        try:
+            self._client.setex(key, ttl, _encode(value))
+        except redis.RedisError as e:
+            logger.warning(f"Redis SETEX failed for {key}: {e}")
+
+def _json_default(value):
+    # Extractor payloads carry NumPy scalars straight from pandas.
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _encode(value) -> bytes:
+    if isinstance(value, bytes):
+        return b"b" + value
+    return b"j" + zlib.compress(json.dumps(value, default=_json_default).encode())
+
+def _decode(raw: bytes):
+    tag, body = raw[:1], raw[1:]
+    if tag == b"b":
+        return body
+    if tag == b"j":
+        return json.loads(zlib.decompress(body))
+    raise ValueError(f"unknown entry type {tag!r}")
+
+def _create_backend():
+    if REDIS_URL and REDIS_AVAILABLE:
+        logger.info("Using Redis cache backend.")
+        return RedisBackend(REDIS_URL)
+    if REDIS_URL:
+        logger.warning("REDIS_URL is set but the redis package is not installed. Falling back to in-process cache.")
+    return MemoryBackend()
+
+backend = _create_backend()
+
+# Network-bound backends get their own few threads so cache lookups never queue
+# behind the blocking yfinance fetches on the event loop's default executor.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache") if backend.blocking else None
+
+async def get_async(key: str):
+    """
+    Looks up `key` from a coroutine; the in-process backend is read inline.
+    """
+    if _executor is None:
+        return backend.get(key)
+    return await asyncio.get_running_loop().run_in_executor(_executor, backend.get, key)
+
+async def set_async(key: str, value, ttl: int):
+    if _executor is None:
+        backend.set(key, value, ttl)
+        return
+    await asyncio.get_running_loop().run_in_executor(_executor, backend.set, key, value, ttl)
+
+def cached(key_prefix: str, ttl: int, partial_ttl: int = None):
+    """
+    Memoizes a ticker-level fetcher under "<key_prefix>:<ticker>" for `ttl` seconds.
+    Payloads carrying an "error" key are not cached so transient failures are retried;
+    payloads listing "missing" sections are kept for `partial_ttl` seconds (not cached if None).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(ticker_symbol: str, *args, **kwargs) -> dict:
+            key = f"{key_prefix}:{ticker_symbol}"
+            result = backend.get(key)
+            if result is None:
+                result = func(ticker_symbol, *args, **kwargs)
+                if "error" not in result and not result.get("missing"):
+                    backend.set(key, result, ttl)
+                elif "error" not in result and partial_ttl:
+                    backend.set(key, result, partial_ttl)
+            return result
+        return wrapper
+    return decorator
@@ -1,22 +1,47 @@
 import yfinance as yf
-import numpy as np
-import math
 import logging
-from .utils import format_crores
+from concurrent.futures import ThreadPoolExecutor
+from .utils import format_crores, YFRateLimitError
+from .cache import cached
 
 logger = logging.getLogger(__name__)
 
-def get_fundamental_analysis(ticker_symbol: str) -> dict:
+# Each of these properties is a separate Yahoo request; they are fetched concurrently.
+STATEMENT_ATTRS = ("info", "financials", "balance_sheet", "quarterly_financials")
+
+# Fundamentals and company info rarely change intraday; a payload with missing statements
+# is only kept briefly so the next request retries them.
+@cached("fundamental", ttl=24 * 60 * 60, partial_ttl=15 * 60)
+def get_fundamental_analysis(ticker_symbol: str, ticker: yf.Ticker = None) -> dict:
     """
     Extracts comprehensive fundamental data for v3.4 Engine.
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
+        if ticker is None:
+            ticker = yf.Ticker(ticker_symbol)
+
+        # A per-call pool keeps concurrent requests from queueing behind each other.
+        with ThreadPoolExecutor(max_workers=len(STATEMENT_ATTRS)) as executor:
+            futures = {attr: executor.submit(getattr, ticker, attr) for attr in STATEMENT_ATTRS}
+
+        for future in futures.values():
+            if isinstance(future.exception(), YFRateLimitError):
+                raise future.exception()
+
+        info = futures["info"].result()
         
         if not info or ('regularMarketPrice' not in info and 'currentPrice' not in info):
             return {"error": "Too many requests or data unavailable"}
 
+        # yfinance reports most failed statement fetches (rate limits included) as an empty
+        # frame rather than an exception. ETFs and new listings never have statements, so an
+        # empty frame only counts as missing for equities.
+        is_equity = info.get('quoteType') == 'EQUITY'
+        missing = [
+            attr.replace("_", " ") for attr in STATEMENT_ATTRS[1:]
+            if futures[attr].exception() is not None or (is_equity and futures[attr].result().empty)
+        ]
+
         current_price = info.get('currentPrice') or info.get('regularMarketPrice')
         
         # 1. Company Metadata
@@ -44,17 +69,20 @@ def get_fundamental_analysis(ticker_symbol: str) -> dict:
         eps = info.get('trailingEps')
         bvps = info.get('bookValue')
         intrinsic_value = None
-        if eps and bvps and eps > 0 and bvps > 0:
-            intrinsic_value = math.sqrt(22.5 * eps * bvps)
+        if eps is not None and bvps is not None and eps > 0 and bvps > 0:
+            intrinsic_value = (22.5 * eps * bvps) ** 0.5
 
+        financials = None
         roce = None
         try:
-            if not ticker.financials.empty and 'EBIT' in ticker.financials.index and not ticker.balance_sheet.empty and 'Total Assets' in ticker.balance_sheet.index and 'Current Liabilities' in ticker.balance_sheet.index:
-                ebit = ticker.financials.loc['EBIT'].iloc[0]
-                assets = ticker.balance_sheet.loc['Total Assets'].iloc[0]
-                curr_liab = ticker.balance_sheet.loc['Current Liabilities'].iloc[0]
+            financials = futures["financials"].result()
+            balance_sheet = futures["balance_sheet"].result()
+            if not financials.empty and 'EBIT' in financials.index and not balance_sheet.empty and 'Total Assets' in balance_sheet.index and 'Current Liabilities' in balance_sheet.index:
+                ebit = financials.loc['EBIT'].iloc[0]
+                assets = balance_sheet.loc['Total Assets'].iloc[0]
+                curr_liab = balance_sheet.loc['Current Liabilities'].iloc[0]
                 
-                if ebit and assets and (assets - curr_liab) > 0:
+                if ebit is not None and assets is not None and (assets - curr_liab) > 0:
                     roce = (ebit / (assets - curr_liab)) * 100
         except Exception as e:
             logger.debug(f"[{ticker_symbol}] Failed to calculate ROCE: {e}")
@@ -62,7 +90,7 @@ def get_fundamental_analysis(ticker_symbol: str) -> dict:
         # 3. Quarterly (4 Quarters)
         quarterly_results = []
         try:
-            qf = ticker.quarterly_financials
+            qf = futures["quarterly_financials"].result()
             if not qf.empty:
                 qf_t = qf.T.head(4)
                 for index, row in qf_t.iterrows():
@@ -78,7 +106,7 @@ def get_fundamental_analysis(ticker_symbol: str) -> dict:
         # 4. Annual (3 Years)
         annual_results = []
         try:
-            af = ticker.financials
+            af = financials if financials is not None else futures["financials"].result()
             if not af.empty:
                 af_t = af.T.head(3)
                 for index, row in af_t.iterrows():
@@ -106,8 +134,11 @@ def get_fundamental_analysis(ticker_symbol: str) -> dict:
                 "dividend_yield": info.get('dividendYield')
             },
             "quarterly_results": quarterly_results,
-            "annual_results": annual_results
+            "annual_results": annual_results,
+            "missing": missing
         }
+    except YFRateLimitError:
+        raise
     except Exception as e:
         logger.error(f"[{ticker_symbol}] Fundamental fetch error: {e}", exc_info=True)
         return {"error": str(e)}
@@ -1,13 +1,16 @@
 import yfinance as yf
-from .utils import get_session
+from .utils import get_session, YFRateLimitError
+from .cache import cached
 
-def get_risk_analysis(ticker_symbol: str) -> dict:
+# Beta, 52-week range and leverage come from .info, which moves slowly.
+@cached("risk", ttl=15 * 60)
+def get_risk_analysis(ticker_symbol: str, ticker: yf.Ticker = None) -> dict:
     """
     Calculates Beta, 52-Week High/Low distance, and Debt flag.
     """
     try:
-        session = get_session()
-        ticker = yf.Ticker(ticker_symbol, session=session)
+        if ticker is None:
+            ticker = yf.Ticker(ticker_symbol, session=get_session())
         info = ticker.info
         
         if not info or ('regularMarketPrice' not in info and 'currentPrice' not in info):
@@ -49,5 +52,7 @@ def get_risk_analysis(ticker_symbol: str) -> dict:
             "High_Debt_Flag": high_debt_flag,
             "Debt_to_Equity_Raw": debt_to_equity
         }
+    except YFRateLimitError:
+        raise
     except Exception as e:
         return {"error": str(e)}
@@ -1,15 +1,23 @@
 import yfinance as yf
-from textblob import TextBlob
+from textblob.en.sentiments import PatternAnalyzer
 import logging
+from .utils import YFRateLimitError
+from .cache import cached
 
 logger = logging.getLogger(__name__)
 
-def get_sentiment_analysis(ticker_symbol: str) -> dict:
+# The analyzer TextBlob uses by default, built once instead of per headline.
+_ANALYZER = PatternAnalyzer()
+
+# Headlines move on the scale of hours.
+@cached("sentiment", ttl=60 * 60)
+def get_sentiment_analysis(ticker_symbol: str, ticker: yf.Ticker = None) -> dict:
     """
     Scrapes the latest headlines and analyzes sentiment using TextBlob.
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
+        if ticker is None:
+            ticker = yf.Ticker(ticker_symbol)
         news = ticker.news
         
         if not news:
@@ -27,8 +35,7 @@ def get_sentiment_analysis(ticker_symbol: str) -> dict:
             if not title:
                 continue
                 
-            analysis = TextBlob(title)
-            polarity = analysis.sentiment.polarity
+            polarity = _ANALYZER.analyze(title).polarity
             
             headlines.append({
                 "headline": title,
@@ -50,6 +57,8 @@ def get_sentiment_analysis(ticker_symbol: str) -> dict:
             "average_polarity": round(avg_polarity, 2),
             "aggregated_sentiment": aggregated_sentiment
         }
+    except YFRateLimitError:
+        raise
     except Exception as e:
         logger.error(f"[{ticker_symbol}] Sentiment fetch error: {e}", exc_info=True)
         return {"error": str(e)}
@@ -1,8 +1,12 @@
 import yfinance as yf
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import math
 import pandas as pd
 import logging
 from datetime import date, timedelta
+from .utils import YFRateLimitError
+from .cache import cached
 
 try:
     from jugaad_data.nse import stock_df
@@ -10,10 +14,32 @@ try:
 except ImportError:
     JUGAAD_AVAILABLE = False
 
-import pandas as pd
-
 logger = logging.getLogger(__name__)
 
+OHLC_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def split_timeframes(df, daily_sessions=None):
+    """
+    Derives the daily (last 60 calendar days, like yfinance's period="60d"), weekly (6 months)
+    and monthly (2 years) frames from a single daily OHLCV history. With `daily_sessions`,
+    the daily frame is the last that many rows instead.
+    """
+    if daily_sessions:
+        d_hist = df.tail(daily_sessions).copy()
+    else:
+        d_hist = df[df.index > df.index[-1] - pd.Timedelta(days=60)].copy()
+    
+    w_hist = df.resample('W').agg(OHLC_AGG).dropna()
+    w_hist = w_hist[w_hist.index >= (df.index[-1] - pd.DateOffset(months=6))]
+    
+    try:
+        m_hist = df.resample('ME').agg(OHLC_AGG).dropna()
+    except Exception:
+        m_hist = df.resample('M').agg(OHLC_AGG).dropna()
+        
+    m_hist = m_hist[m_hist.index >= (df.index[-1] - pd.DateOffset(years=2))]
+    return d_hist, w_hist, m_hist
+
 def fetch_jugaad_fallback(ticker_symbol: str):
     if not JUGAAD_AVAILABLE or not ticker_symbol.endswith(".NS"):
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
@@ -37,63 +63,64 @@ def fetch_jugaad_fallback(ticker_symbol: str):
         for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
             df[col] = pd.to_numeric(df[col], errors='coerce')
             
-        d_hist = df.tail(60)
-        
-        w_hist = df.resample('W').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
-        w_hist = w_hist[w_hist.index >= (pd.Timestamp.today() - pd.DateOffset(months=6))]
-        
-        try:
-            m_hist = df.resample('ME').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
-        except Exception:
-            m_hist = df.resample('M').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
-            
-        m_hist = m_hist[m_hist.index >= (pd.Timestamp.today() - pd.DateOffset(years=2))]
-        
         logger.info(f"[{ticker_symbol}] Jugaad fallback success!")
-        return d_hist, w_hist, m_hist
+        return split_timeframes(df, daily_sessions=60)
     except Exception as e:
         logger.error(f"[{ticker_symbol}] Jugaad fallback error: {e}", exc_info=True)
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
+def atr_array(high, low, close, period=14):
+    """
+    Average True Range over raw float arrays; the first period-1 values are NaN.
+    """
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    # Row-wise max of the three ranges; fmax skips the missing previous close on the first bar.
+    true_range = np.fmax.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    atr = np.full(len(true_range), np.nan)
+    atr[period - 1:] = sliding_window_view(true_range, period).mean(axis=1)
+    return atr
+
 def calculate_atr(df, period=14):
     if len(df) < period:
         return pd.Series(index=df.index, dtype=float)
-    high_low = df['High'] - df['Low']
-    high_cp = np.abs(df['High'] - df['Close'].shift())
-    low_cp = np.abs(df['Low'] - df['Close'].shift())
-    df_tr = pd.concat([high_low, high_cp, low_cp], axis=1)
-    true_range = np.max(df_tr, axis=1)
-    atr = true_range.rolling(period).mean()
-    return atr
+    atr = atr_array(df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy(), period)
+    return pd.Series(atr, index=df.index)
 
 def calculate_supertrend(df, period=10, multiplier=3):
     if len(df) < period:
         return None, None, None
-    atr = calculate_atr(df, period)
-    hl2 = (df['High'] + df['Low']) / 2
-    final_ub = hl2 + (multiplier * atr)
-    final_lb = hl2 - (multiplier * atr)
+    high = df['High'].to_numpy()
+    low = df['Low'].to_numpy()
+    close = df['Close'].to_numpy()
+    atr = atr_array(high, low, close, period)
+    hl2 = (high + low) / 2
+    
+    # The band carry-forward is inherently sequential, so run it over plain floats
+    # rather than indexing arrays element by element. Only the final state is needed.
+    final_ub = (hl2 + (multiplier * atr)).tolist()
+    final_lb = (hl2 - (multiplier * atr)).tolist()
+    close = close.tolist()
     
-    supertrend = [True] * len(df)
-    for i in range(1, len(df)):
-        if df['Close'].iloc[i] > final_ub.iloc[i-1]:
-            supertrend[i] = True
-        elif df['Close'].iloc[i] < final_lb.iloc[i-1]:
-            supertrend[i] = False
+    supertrend = True
+    for i in range(1, len(close)):
+        if close[i] > final_ub[i-1]:
+            supertrend = True
+        elif close[i] < final_lb[i-1]:
+            supertrend = False
         else:
-            supertrend[i] = supertrend[i-1]
-            if supertrend[i] and final_lb.iloc[i] < final_lb.iloc[i-1]:
-                final_lb.iloc[i] = final_lb.iloc[i-1]
-            if not supertrend[i] and final_ub.iloc[i] > final_ub.iloc[i-1]:
-                final_ub.iloc[i] = final_ub.iloc[i-1]
+            if supertrend and final_lb[i] < final_lb[i-1]:
+                final_lb[i] = final_lb[i-1]
+            if not supertrend and final_ub[i] > final_ub[i-1]:
+                final_ub[i] = final_ub[i-1]
     
-    return supertrend[-1], final_ub.iloc[-1], final_lb.iloc[-1]
+    return supertrend, final_ub[-1], final_lb[-1]
 
 def get_trend_signal(df):
     if df.empty or len(df) < 20:
         return "N/A"
-    sma_20 = df['Close'].rolling(window=20).mean().iloc[-1]
-    current_price = df['Close'].iloc[-1]
+    closes = df['Close'].to_numpy()
+    sma_20 = closes[-20:].mean()
+    current_price = closes[-1]
     if current_price > sma_20 * 1.05:
         return "Strong Bullish"
     elif current_price > sma_20:
@@ -103,21 +130,25 @@ def get_trend_signal(df):
     else:
         return "Bearish"
 
-def calculate_technical_indicators(ticker_symbol: str) -> dict:
+# Prices move intraday, so technicals are only reused for a minute.
+@cached("technical", ttl=60)
+def calculate_technical_indicators(ticker_symbol: str, ticker: yf.Ticker = None) -> dict:
     """
     Calculates detailed technical indicators for v3.4 Engine with NSE fallback.
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
+        if ticker is None:
+            ticker = yf.Ticker(ticker_symbol)
         
-        # 1. Multi-timeframe Analysis
-        d_hist = ticker.history(period="60d", interval="1d")
-        w_hist = ticker.history(period="6mo", interval="1wk")
-        m_hist = ticker.history(period="2y", interval="1mo")
+        # 1. Multi-timeframe Analysis (one daily download; weekly/monthly are resampled from it)
+        # Only OHLC is used, so skip the dividend/split columns.
+        hist = ticker.history(period="2y", interval="1d", actions=False)
         
-        if d_hist.empty:
+        if hist.empty:
             logger.warning(f"[{ticker_symbol}] yfinance returned empty dataframe. Activating fallback.")
             d_hist, w_hist, m_hist = fetch_jugaad_fallback(ticker_symbol)
+        else:
+            d_hist, w_hist, m_hist = split_timeframes(hist)
 
         if d_hist.empty:
             return {"error": "No historical data found"}
@@ -127,15 +158,14 @@ def calculate_technical_indicators(ticker_symbol: str) -> dict:
              logger.warning(f"[{ticker_symbol}] Less than 20 days of data found, some indicators may be null.")
 
         # 2. Indicators (on Daily)
-        # RSI
+        # RSI (Wilder's smoothing, alpha = 1/14); only the latest value is needed
         current_rsi = None
         if len(d_hist) >= 15:
             delta = d_hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            d_hist['RSI'] = 100 - (100 / (1 + rs))
-            current_rsi = d_hist['RSI'].iloc[-1]
+            avg_gain = delta.clip(lower=0).ewm(alpha=1/14, adjust=False, min_periods=14).mean().iloc[-1]
+            avg_loss = (-delta.clip(upper=0)).ewm(alpha=1/14, adjust=False, min_periods=14).mean().iloc[-1]
+            rs = avg_gain / avg_loss if avg_loss else np.inf
+            current_rsi = 100 - (100 / (1 + rs))
 
         # MACD
         macd_signal = "Neutral"
@@ -153,20 +183,21 @@ def calculate_technical_indicators(ticker_symbol: str) -> dict:
         current_price = d_hist['Close'].iloc[-1]
 
         if len(d_hist) >= 20:
-            sma_20 = d_hist['Close'].rolling(window=20).mean()
-            std_20 = d_hist['Close'].rolling(window=20).std()
-            upper_bb = sma_20 + (std_20 * 2)
-            lower_bb = sma_20 - (std_20 * 2)
-            upper_bb_val = upper_bb.iloc[-1]
-            lower_bb_val = lower_bb.iloc[-1]
+            # Only the latest band is reported, so reduce the last 20 closes directly
+            # (sample std, matching pandas' rolling().std()).
+            window = d_hist['Close'].to_numpy()[-20:]
+            sma_20 = window.mean()
+            std_20 = window.std(ddof=1)
+            upper_bb_val = sma_20 + (std_20 * 2)
+            lower_bb_val = sma_20 - (std_20 * 2)
             bb_pos = "Overbought" if current_price > upper_bb_val else "Oversold" if current_price < lower_bb_val else "Neutral"
         
         # SuperTrend
         st_signal, st_ub, st_lb = calculate_supertrend(d_hist)
 
-        # 3. Support & Resistance
-        support = d_hist['Low'].tail(30).min() if not d_hist.empty else None
-        resistance = d_hist['High'].tail(30).max() if not d_hist.empty else None
+        # 3. Support & Resistance (fmin/fmax skip NaN bars like Series.min/max)
+        support = np.fmin.reduce(d_hist['Low'].to_numpy()[-30:]) if not d_hist.empty else None
+        resistance = np.fmax.reduce(d_hist['High'].to_numpy()[-30:]) if not d_hist.empty else None
 
         # 4. Expert Multi-timeframe Summary
         timeframe_signals = {
@@ -176,22 +207,24 @@ def calculate_technical_indicators(ticker_symbol: str) -> dict:
         }
 
         return {
-            "RSI": round(current_rsi, 2) if current_rsi is not None and not np.isnan(current_rsi) else None,
+            "RSI": round(current_rsi, 2) if current_rsi is not None and not math.isnan(current_rsi) else None,
             "MACD_Signal": macd_signal,
             "Bollinger": {
-                "upper": round(upper_bb_val, 2) if upper_bb_val is not None and not np.isnan(upper_bb_val) else None,
-                "lower": round(lower_bb_val, 2) if lower_bb_val is not None and not np.isnan(lower_bb_val) else None,
+                "upper": round(upper_bb_val, 2) if upper_bb_val is not None and not math.isnan(upper_bb_val) else None,
+                "lower": round(lower_bb_val, 2) if lower_bb_val is not None and not math.isnan(lower_bb_val) else None,
                 "position": bb_pos
             },
             "SuperTrend": {
                 "signal": "Bullish" if st_signal else "Bearish" if st_signal is False else "Neutral",
-                "value": round(st_lb if st_signal else st_ub, 2) if st_signal is not None and not np.isnan(st_lb if st_signal else st_ub) else None
+                "value": round(st_lb if st_signal else st_ub, 2) if st_signal is not None and not math.isnan(st_lb if st_signal else st_ub) else None
             },
-            "Support": round(support, 2) if support is not None and not np.isnan(support) else None,
-            "Resistance": round(resistance, 2) if resistance is not None and not np.isnan(resistance) else None,
+            "Support": round(support, 2) if support is not None and not math.isnan(support) else None,
+            "Resistance": round(resistance, 2) if resistance is not None and not math.isnan(resistance) else None,
             "current_price": current_price,
             "timeframe_analysis": timeframe_signals
         }
+    except YFRateLimitError:
+        raise
     except Exception as e:
         logger.error(f"[{ticker_symbol}] Technical fetch error: {e}", exc_info=True)
         return {"error": str(e)}
@@ -1,19 +1,45 @@
 import requests
+import math
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+# Extractor contract (technical, fundamental, sentiment, risk): each takes the ticker symbol
+# plus an optional yf.Ticker for it, so one instance (and its .info) can be shared across
+# modules, and reports failures as {"error": ...}. YFRateLimitError is the exception: it is
+# re-raised so the API can tell clients to back off instead of serving a partial analysis.
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:
+    # Older yfinance releases do not raise a dedicated rate-limit error.
+    class YFRateLimitError(Exception):
+        pass
+
+@lru_cache(maxsize=1)
 def get_session():
     """
-    Returns a requests session with a User-Agent to prevent rate-limiting by Yahoo Finance.
+    Returns a shared requests session with a User-Agent to prevent rate-limiting by Yahoo Finance.
+    Its pooled connections are kept alive across requests, and transient 5xx errors are retried with backoff.
     """
     session = requests.Session()
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     })
+    # 429 is deliberately not retried: yfinance must see it to raise YFRateLimitError. Once retries
+    # run out the last response is returned (not a RetryError) so yfinance handles it as usual.
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     return session
 
+CRORE = 1e7
+
 def format_crores(value: float) -> str:
     """
     Formats a large number into Crores.
     """
-    if value is None or not isinstance(value, (int, float)):
+    if value is None or not isinstance(value, (int, float)) or math.isnan(value):
         return "N/A"
-    return f"{value / 10**7:.2f} Cr"
+    return f"{value / CRORE:.2f} Cr"
+